@@ -1,20 +1,13 @@
 # app/__init__.py
 import os
+import time
 from datetime import datetime, date as _date, timedelta
-from flask import Flask
+from flask import Flask, g, has_app_context
 from dotenv import load_dotenv
 from typing import Optional
 from typing import Any
 
 
-
-# Try to import Supabase client safely
-try:
-    from supabase import create_client, Client  # type: ignore
-except Exception:
-    create_client = None
-    Client = None  # type: ignore
-
 # Load .env as early as possible so env vars are available everywhere
 load_dotenv()
 
@@ -25,33 +18,115 @@ supabase: Any = None
 # Timezone config
 TIMEZONE = os.getenv("TIMEZONE", "America/New_York")
 
-# Prefer stdlib zoneinfo; gracefully fall back if tzdata isn't present on Windows
-try:
-    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError  # Python 3.9+
-
-    def get_today_et() -> _date:
-        try:
-            return datetime.now(ZoneInfo(TIMEZONE)).date()
-        except ZoneInfoNotFoundError:
-            # Fallback to pytz if zoneinfo db isn't available (common on Windows)
-            try:
-                import pytz  # type: ignore
-                tz = pytz.timezone(TIMEZONE)
-                return datetime.now(tz).date()
-            except Exception:
-                print("[WARN] Neither zoneinfo nor pytz could resolve timezone; using system local date.")
-                return datetime.now().date()
-
-except Exception:
-    # zoneinfo module not available (very old Python) → try pytz; else local time
-    def get_today_et() -> _date:
-        try:
-            import pytz  # type: ignore
-            tz = pytz.timezone(TIMEZONE)
-            return datetime.now(tz).date()
-        except Exception:
-            print("[WARN] No timezone library available; using system local date.")
-            return datetime.now().date()
+def _resolve_tz() -> Any:
+    """Resolve TIMEZONE once at import; None means 'use system local time'."""
+    # Prefer stdlib zoneinfo; gracefully fall back if tzdata isn't present on Windows
+    try:
+        from zoneinfo import ZoneInfo  # Python 3.9+
+        return ZoneInfo(TIMEZONE)
+    except Exception:
+        pass
+    # zoneinfo db missing (common on Windows) or very old Python → try pytz
+    try:
+        import pytz  # type: ignore
+        return pytz.timezone(TIMEZONE)
+    except Exception:
+        print("[WARN] Neither zoneinfo nor pytz could resolve timezone; using system local date.")
+        return None
+
+
+_TZ = _resolve_tz()
+
+
+# (monotonic expiry, ET date, "YYYY-MM-DD") — refreshed at most once a minute
+_TODAY_CACHE: tuple[float, Any, str] = (0.0, None, "")
+
+
+def _today_et_cached() -> tuple[_date, str]:
+    global _TODAY_CACHE
+    expires, d, iso = _TODAY_CACHE
+    mono = time.monotonic()
+    if mono < expires:
+        return d, iso
+    now = datetime.now(_TZ) if _TZ else datetime.now()
+    d = now.date()
+    iso = d.isoformat()
+    # Never hold a date past ET midnight
+    to_midnight = 86400 - (now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6)
+    _TODAY_CACHE = (mono + min(60, to_midnight), d, iso)
+    return d, iso
+
+
+def _today_et_for_request() -> tuple[_date, str]:
+    # Pin the date for the whole request/app context so a request straddling ET
+    # midnight never mixes yesterday's session reset with today's bundle
+    if not has_app_context():
+        return _today_et_cached()
+    today = g.get("_today_et")
+    if today is None:
+        today = g._today_et = _today_et_cached()
+    return today
+
+
+def get_today_et() -> _date:
+    return _today_et_for_request()[0]
+
+
+def get_today_et_str() -> str:
+    """Today's ET date as 'YYYY-MM-DD' (the key used for daily_game/results)."""
+    return _today_et_for_request()[1]
+
+
+def _configure_postgrest_pool(client: Any) -> None:
+    """Swap the PostgREST httpx session for one with a longer-lived keep-alive pool.
+
+    httpx drops idle connections after 5s by default, so on a quiet site nearly
+    every DB call paid a fresh TCP+TLS handshake to Supabase.
+    """
+    import httpx
+    from postgrest.utils import SyncClient  # type: ignore
+
+    pg = client.postgrest
+    old = pg.session
+    pg.session = SyncClient(
+        base_url=old.base_url,
+        headers=old.headers,
+        timeout=old.timeout,
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=30),
+    )
+    old.close()
+
+
+def _orjson_provider_class() -> Optional[type]:
+    """A Flask JSON provider backed by orjson, or None when orjson isn't installed.
+
+    Flask routes every JSON response *and* the signed session cookie through
+    app.json, so this speeds up both.
+    """
+    try:
+        import orjson  # type: ignore
+    except Exception:
+        return None
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        def dumps(self, obj: Any, **kwargs: Any) -> str:
+            # Match DefaultJSONProvider's output: sorted keys unless turned off, and dates go
+            # through self.default (HTTP-date strings). separators/ensure_ascii only change
+            # whitespace and escaping, not the decoded value.
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if kwargs.get("sort_keys", self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get("indent"):
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+        def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+            return orjson.loads(s)
+
+    return OrjsonProvider
 
 
 def create_app() -> Flask:
@@ -66,15 +141,31 @@ def create_app() -> Flask:
     app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(days=180)
     app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
     app.config["SESSION_COOKIE_SECURE"] = True  # Render is HTTPS; set False only for local http
+    # Only re-sign/re-send the cookie when the session actually changes (gameplay
+    # writes it daily, which keeps the 180-day expiry rolling)
+    app.config["SESSION_REFRESH_EACH_REQUEST"] = False
+
+    provider = _orjson_provider_class()
+    if provider is not None:
+        app.json = provider(app)
 
 
     # Initialize Supabase client if env vars are present
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_ANON_KEY")
-    if url and key and create_client:
+    if url and key:
         try:
-            supabase = create_client(url, key)
+            # Imported here so JSON-mode processes never pay the supabase import cost
+            from supabase import create_client  # type: ignore
+            from supabase.lib.client_options import ClientOptions  # type: ignore
+            # Fail fast instead of postgrest's 120s default: a hung call pins a worker thread
+            timeout = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+            supabase = create_client(url, key, options=ClientOptions(postgrest_client_timeout=timeout))
             print("[INFO] Supabase configured.")
+            try:
+                _configure_postgrest_pool(supabase)
+            except Exception as e:
+                print(f"[WARN] Supabase HTTP pool tuning skipped: {e}")
         except Exception as e:
             supabase = None
             print(f"[WARN] Supabase client init failed: {e}")
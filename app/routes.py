@@ -1,17 +1,20 @@
 import os
-from datetime import date
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from functools import lru_cache
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
 from .services.daily import load_players_local, pick_player_of_day, stat_lines_for_player
 from .services.scoring import compute_score,compute_total_score, HINT_COSTS
-from . import supabase, get_today_et
+from . import supabase, get_today_et_str
 from flask import current_app
-from datetime import datetime as _dt, timezone as _tz
-from difflib import get_close_matches
-from .services.hints import resolve_hint_values
+from .services.hints import canon
 # Use an alias so we never shadow it accidentally
-from .services.hints import resolve_hint_values as hints_resolve
-from .services.match import is_typo_match, suggest_players
-from datetime import timedelta  # add this
+from .services.hints import resolve_hint_values_batch as hints_resolve_batch
+from .services.match import is_typo_match, norm_name, suggest_players, typo_key
 
 
 
@@ -19,232 +22,356 @@ from .services.scoring import (
     START_SCORE,
     PENALTY_PER_REVEAL,
     HINT_COSTS,
+    HINT_BITS,
     compute_score,
     compute_total_score,
+    hints_to_mask,
+    mask_to_hints,
 )
 
+# Hint buttons in UI order, minus the kinds hidden in every mode (toggle here)
+_HIDDEN_HINTS = frozenset({"record", "conference"})
+_HINT_BUTTONS = tuple(h for h in HINT_COSTS if h not in _HIDDEN_HINTS)
+
+
+def _session_hint_mask(key: str) -> int:
+    """Hint purchases as a HINT_BITS int (older cookies hold a list)."""
+    return hints_to_mask(session.get(key, 0))
+
+
+def _session_hints(key: str) -> list[str]:
+    """Hint kinds bought this game."""
+    return mask_to_hints(_session_hint_mask(key))
+
+
+@lru_cache(maxsize=None)
+def _available_hints(mask: int, collapse_team: bool = True) -> tuple[str, ...]:
+    """Hint buttons to show for a purchase mask (at most 2**len(HINT_COSTS) entries).
+
+    With collapse_team, Team makes Conference & Division free (both hidden) and
+    Division makes Conference redundant.
+    """
+    hs = [h for h in _HINT_BUTTONS if not mask & HINT_BITS[h]]
+    if collapse_team:
+        if mask & HINT_BITS["team"]:
+            hs = [h for h in hs if h not in ("conference", "division")]
+        elif mask & HINT_BITS["division"]:
+            hs = [h for h in hs if h != "conference"]
+    return tuple(hs)
+
+
+def _buy_hint(key: str, kind: str) -> None:
+    """Record a hint purchase; only touches the session when the bit is new."""
+    mask = hints_to_mask(session.get(key, 0))
+    bit = HINT_BITS[kind]
+    if not mask & bit:
+        session[key] = mask | bit
+
+
+def _session_set(key: str, value) -> None:
+    """Write a session key only when it changes: any write re-signs and re-sends the cookie."""
+    if session.get(key) != value:
+        session[key] = value
+
 # Check if the current username has already recorded a result today
 def has_played_today(username: str) -> bool:
     if not username:
         return False
-    today_et = str(get_today_et())
-    # DB path
+    today_et = get_today_et_str()
+    pending = session.get("pending_save") if supabase else None
+    # Once known solved, it stays solved for the day: no need to ask the DB again
+    # (unless the background save for that solve hasn't been confirmed yet)
+    if session.get("solved_date") == today_et and not pending:
+        return True
+    # DB path: one EXISTS over results joined to users (has_played_today in supabase/functions.sql)
     if supabase:
         try:
-            u = (
-                supabase.table("users")
-                .select("id,username")
-                .ilike("username", username)
-                .maybe_single()
-                .execute()
-            )
-            row = getattr(u, "data", None)
-            uid = row["id"] if (row and row.get("username", "").lower() == username.lower()) else None
-
-
-            if not uid:
-                return False
-            r = (supabase.table("results")
-                 .select("user_id")
-                 .eq("user_id", uid)
-                 .eq("game_date", today_et)
-                 .maybe_single()
-                 .execute())
-            return bool(getattr(r, "data", None))
+            r = supabase.rpc("has_played_today", {"p_username": username, "p_date": today_et}).execute()
+            played = bool(getattr(r, "data", None))
         except Exception:
             current_app.logger.exception("has_played_today failed; falling back to session flag")
             return bool(session.get("solved_today"))
+        if pending:
+            if not played or pending.get("p_game_date") != today_et:
+                # The save for a solve never landed (or is still queued): submit it again.
+                # submit_guess is first-write-wins, so a duplicate is harmless.
+                _submit_write(_save_daily_result, pending)
+            if played or pending.get("p_game_date") != today_et:
+                session.pop("pending_save", None)
+            else:
+                return True
+        if played:
+            session["solved_date"] = today_et
+        return played
     # Local/session fallback
     return bool(session.get("solved_today"))
 
-def _update_streaks_after_win(user_id: int) -> None:
-    """Increment user's current streak if they also solved yesterday; update best streak."""
-    if not supabase or not user_id:
-        return
+bp = Blueprint("main", __name__)
 
-    # Was there a result yesterday?
-    yday = str(get_today_et() - timedelta(days=1))
-    try:
-        yres = (
-            supabase.table("results")
-            .select("id")
-            .eq("user_id", user_id)
-            .eq("game_date", yday)
-            .maybe_single()
-            .execute()
-        )
-        had_yesterday = bool(getattr(yres, "data", None))
-    except Exception:
-        current_app.logger.exception("streaks: check yesterday failed")
-        had_yesterday = False
+# Local JSON roster (fallback mode); parsed on first use, not at import
+@lru_cache(maxsize=1)
+def _players() -> list[dict]:
+    return load_players_local()
 
-    # Existing streak row
-    try:
-        srow = (
-            supabase.table("streaks")
-            .select("current_streak,best_streak")
-            .eq("user_id", user_id)
-            .maybe_single()
-            .execute()
-        )
-        sdata = getattr(srow, "data", None) or {}
-        prev_current = int(sdata.get("current_streak") or 0)
-        prev_best = int(sdata.get("best_streak") or 0)
-    except Exception:
-        prev_current = 0
-        prev_best = 0
+# Suggestion choices as {full_name: normalized name}, plus the same grouped by position.
+# Names are normalized once here so suggest_players never re-normalizes the roster per guess.
+# Rebuilt hourly in the background (stale data is served meanwhile); warmed at startup.
+_SUGGEST_CACHE: tuple[dict[str, str], dict[str, dict[str, str]]] | None = None
+_SUGGEST_TTL_SECONDS = 3600
+_SUGGEST_BUILT_AT = 0.0
+_SUGGEST_REFRESHING = threading.Lock()  # held while a background rebuild runs
 
-    new_current = (prev_current + 1) if had_yesterday else 1
-    new_best = max(prev_best, new_current)
 
+def _fetch_suggest_rows() -> list[tuple[str, str]]:
+    """(full_name, position) for every eligible player; [] if the DB is unavailable."""
+    if not supabase:
+        return []
     try:
-        supabase.table("streaks").upsert(
-            {
-                "user_id": user_id,
-                "current_streak": new_current,
-                "best_streak": new_best,
-                "updated_at": _dt.now(_tz.utc).isoformat(),
-            },
-            on_conflict="user_id",
-        ).execute()
+        resp = supabase.table("v_players_eligible").select("full_name, position").execute()
+        rows = getattr(resp, "data", []) or []
+        return [(r["full_name"], r.get("position") or "") for r in rows if r.get("full_name")]
     except Exception:
-        current_app.logger.exception("streaks: upsert failed")
+        current_app.logger.exception("Failed to build suggestion population from DB; falling back to JSON")
+        return []
 
 
-bp = Blueprint("main", __name__)
-
-# In-memory cache for local mode
-PLAYERS = load_players_local()
+def _index_suggest_rows(out: list[tuple[str, str]]) -> tuple[dict[str, str], dict[str, dict[str, str]]]:
+    choices: dict[str, str] = {}
+    by_pos: dict[str, dict[str, str]] = defaultdict(dict)
+    for full, pos in out:
+        key = norm_name(full)
+        choices[full] = key
+        by_pos[pos][full] = key
+    return choices, dict(by_pos)
 
-# Cached list of (full_name, position) for suggestions
-_SUGGEST_CACHE: list[tuple[str, str]] | None = None
 
-def _get_suggest_population() -> list[tuple[str, str]]:
-    global _SUGGEST_CACHE
-    if _SUGGEST_CACHE is not None:
-        return _SUGGEST_CACHE
+def _refresh_suggest_population() -> None:
+    global _SUGGEST_CACHE, _SUGGEST_BUILT_AT
+    try:
+        rows = _fetch_suggest_rows()
+        # Keep serving what we have if the DB hiccups; retry after the next TTL
+        if rows:
+            _SUGGEST_CACHE = _index_suggest_rows(rows)
+        _SUGGEST_BUILT_AT = time.monotonic()
+    finally:
+        _SUGGEST_REFRESHING.release()
+
+
+def _get_suggest_population() -> tuple[dict[str, str], dict[str, dict[str, str]]]:
+    global _SUGGEST_CACHE, _SUGGEST_BUILT_AT
+    cached = _SUGGEST_CACHE
+    if cached is not None:
+        stale = supabase and time.monotonic() - _SUGGEST_BUILT_AT > _SUGGEST_TTL_SECONDS
+        if stale and _SUGGEST_REFRESHING.acquire(blocking=False):
+            try:
+                _submit_db(_refresh_suggest_population)
+            except Exception:
+                # Never queued (e.g. pool shut down), so its finally won't run: release here
+                _SUGGEST_REFRESHING.release()
+                current_app.logger.exception("Could not schedule suggestion roster refresh")
+        return cached
 
-    out: list[tuple[str, str]] = []
-    if supabase:
-        try:
-            resp = supabase.table("v_players_eligible").select("full_name, position").execute()
-            rows = getattr(resp, "data", []) or []
-            out = [(r["full_name"], r.get("position") or "") for r in rows if r.get("full_name")]
-        except Exception:
-            current_app.logger.exception("Failed to build suggestion population from DB; falling back to JSON")
+    # Cold worker (startup warm-up not finished yet): build synchronously
+    out = _fetch_suggest_rows()
     if not out:
         # local JSON fallback
-        for p in PLAYERS or []:
+        for p in _players() or []:
             out.append((p.get("full_name", ""), p.get("position", "")))
-    _SUGGEST_CACHE = out
-    return out
+    _SUGGEST_CACHE = _index_suggest_rows(out)
+    _SUGGEST_BUILT_AT = time.monotonic()
+    return _SUGGEST_CACHE
 
 
-def _db_player_bundle(today_str: str) -> dict:
-    """Return today's player & stat lines from Supabase. Creates daily row if missing."""
-    # 1) Try to get today's daily_game row
-    resp = (
-        supabase.table("daily_game")
-        .select("player_id")
-        .eq("game_date", today_str)
-        .limit(1)
-        .execute()
-    )
-    data = getattr(resp, "data", None) or []
-    pid = data[0]["player_id"] if data else None
-
-    # 2) If missing, choose a random player id in Python and persist the daily_game row
-    if not pid:
-        presp = supabase.table("v_players_eligible").select("id").limit(5000).execute()
-        pids = [r["id"] for r in (getattr(presp, "data", None) or [])]
-        if not pids:
-            raise RuntimeError("No players available in DB to choose daily game.")
-        import random
-        pid = random.choice(pids)
-        supabase.table("daily_game").upsert({"game_date": today_str, "player_id": pid}).execute()
-
-    # 3) Fetch player meta (INCLUDE college)
-    meta = (
-        supabase.table("v_players_eligible")
-        .select("id,full_name,player_slug,position,college")
-        .eq("id", pid)
-        .limit(1)
-        .execute()
-    )
-    mdata = getattr(meta, "data", None) or []
-    if not mdata:
-        raise RuntimeError(f"Player id {pid} not found in players table.")
-    player_meta = mdata[0]
-    college = (player_meta.get("college") or "").strip() or None
-
-    # 4) Fetch seasons and adapt to template shape
-    sresp = (
-        supabase.table("player_seasons")
-        .select("season,team,stat1_name,stat1_value,stat2_name,stat2_value,stat3_name,stat3_value")
-        .eq("player_id", pid)
-        .order("season")
-        .execute()
-    )
-    sdata = getattr(sresp, "data", None) or []
+def _suggest_pool(position: str | None) -> dict[str, str]:
+    """Suggestion candidates: same-position players when we have any, else everyone."""
+    population, by_pos = _get_suggest_population()
+    return by_pos.get(position) or population
+
+
+def _answer_keys(bundle: dict) -> frozenset:
+    """Exact answers for a bundle: full name and slug, casefolded (handles non-ASCII names),
+    plus their norm_name forms so punctuation/suffix variants ("A.J. Brown", "Jr.") match
+    without fuzzy scoring."""
+    full = bundle.get("full_name") or ""
+    slug = (bundle.get("player_slug") or "").replace("-", " ")
+    return frozenset({full.casefold(), slug.casefold(), norm_name(full), norm_name(slug)}) - {""}
+
+
+def _is_exact_answer(guess: str, keys: frozenset) -> bool:
+    return guess.casefold() in keys or norm_name(guess) in keys
 
-    stat_lines = [{
+
+def _with_answer_keys(bundle: dict) -> dict:
+    """Store the exact answers and typo key on a bundle when it is built, not per guess."""
+    bundle["_candidates"] = _answer_keys(bundle)
+    bundle["_typo_key"] = typo_key(bundle.get("full_name") or "")
+    return bundle
+
+
+def _stat_lines_from_rows(rows: list[dict]) -> list[dict]:
+    """Adapt player_seasons rows to the template's stat-line shape."""
+    return [{
         "season": r["season"], "team": r["team"],
         "stats": {
             r["stat1_name"]: r["stat1_value"],
             r["stat2_name"]: r["stat2_value"],
             r["stat3_name"]: r["stat3_value"],
         }
-    } for r in sdata]
+    } for r in rows]
+
+
+def _db_player_bundle(today_str: str) -> dict:
+    """Return today's player & stat lines from Supabase. Creates daily row if missing.
+
+    One round-trip: the get_or_create_daily_bundle RPC (supabase/functions.sql)
+    picks/persists the daily_game row and returns player meta + seasons as JSON.
+    """
+    resp = supabase.rpc("get_or_create_daily_bundle", {"d": today_str}).execute()
+    player_meta = getattr(resp, "data", None)
+    if not player_meta:
+        raise RuntimeError("No players available in DB to choose daily game.")
 
     return {
-        "id": pid,
+        "id": player_meta["id"],
         "full_name": player_meta["full_name"],
         "player_slug": player_meta["player_slug"],
         "position": player_meta["position"],
-        "college": college,            # <-- now included
-        "stat_lines": stat_lines,
+        "college": player_meta.get("college"),  # blank -> null in SQL
+        "stat_lines": _stat_lines_from_rows(player_meta.get("seasons") or []),
     }
 
-def _get_or_create_user_id_ci(username: str) -> int | None:
-    """Case-insensitive get-or-create for users.username."""
+def _get_or_create_user_id_ci(username: str) -> str | None:
+    """Case-insensitive get-or-create for users.username; returns the users.id uuid."""
     if not supabase or not username:
         return None
 
-    # Case-insensitive exact match: ilike, then verify in Python
-    sel = (
-        supabase.table("users")
-        .select("id,username")
-        .ilike("username", username)
-        .maybe_single()
-        .execute()
-    )
-    row = getattr(sel, "data", None)
-    if row and (row.get("username", "").lower() == username.lower()):
-        return row["id"]
+    # One round-trip: lookup, insert-if-missing and the race re-read all happen in
+    # get_or_create_user (supabase/functions.sql)
+    resp = supabase.rpc("get_or_create_user", {"p_username": username}).execute()
+    return getattr(resp, "data", None) or None
+
+
+def _session_user_id(username: str):
+    """User id for the signed-in browser, looked up once and then kept in the session.
+    Usernames are locked per browser, so the id never changes underneath us."""
+    uid = session.get("user_id")
+    if uid is None:
+        uid = _get_or_create_user_id_ci(username)
+        if uid is not None:
+            session["user_id"] = uid
+    return uid
+
+
+# Small shared pool for overlapping independent Supabase round-trips within one request.
+# supabase-py is sync, but its httpx client is thread-safe, so threads give us the overlap.
+_DB_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="supabase")
+# Fire-and-forget writes get their own threads so a slow Supabase can't queue
+# request-path reads behind saves nobody is waiting on
+_WRITE_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="supabase-write")
+
+
+def _submit_to(pool: ThreadPoolExecutor, fn, *args) -> Future:
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            return fn(*args)
+
+    return pool.submit(run)
+
+
+def _submit_db(fn, *args) -> Future:
+    """Run fn(*args) on the DB pool inside the current app context (for current_app.logger)."""
+    return _submit_to(_DB_POOL, fn, *args)
+
+
+def _submit_write(fn, *args) -> Future:
+    """Like _submit_db, but for background writes (runs on _WRITE_POOL)."""
+    return _submit_to(_WRITE_POOL, fn, *args)
+
+
+@bp.record_once
+def _warm_suggest_population(state) -> None:
+    """Build the suggestion roster off the request path when the blueprint is registered."""
+    app = state.app
+
+    def run():
+        with app.app_context():
+            _get_suggest_population()
+
+    _DB_POOL.submit(run)
+
+
+# Today's bundle is the same for every user all day: cache it per ET date string.
+# Single entry, so the first request of a new day evicts yesterday's bundle.
+_BUNDLE_CACHE: dict[str, dict] = {}
+_BUNDLE_LOCK = threading.Lock()
+# A JSON fallback (or a bundle whose team records failed to load) served because Supabase
+# misbehaved is only kept this long, then the DB is retried
+_BUNDLE_FALLBACK_TTL = 60
+_BUNDLE_RETRY_AT = 0.0
+
+
+def _cached_today_bundle(today_et: str) -> dict | None:
+    cached = _BUNDLE_CACHE.get(today_et)
+    if cached is None:
+        return None
+    degraded = cached.get("id") is None or not cached.get("_hints_complete", True)
+    if degraded and supabase and time.monotonic() >= _BUNDLE_RETRY_AT:
+        return None
+    return cached
 
-    # Not found -> try to insert (DB index prevents duplicates)
+
+def get_today_player_bundle(today_et: str | None = None) -> dict:
+    """Single source of truth for /play and /guess.
+       Prefer Supabase + ET; fall back to local JSON if DB fails/not configured.
+       Pass the request's `today_et` when calling off the request thread, so both agree on the day."""
+    global _BUNDLE_CACHE, _BUNDLE_RETRY_AT
+    today_et = today_et or get_today_et_str()
+    cached = _cached_today_bundle(today_et)
+    if cached is not None:
+        return cached
+
+    # Threaded workers: only one request per day does the fetch, the rest wait for it
+    with _BUNDLE_LOCK:
+        cached = _cached_today_bundle(today_et)
+        if cached is not None:
+            return cached
+
+        # Exact/slug answers, normalized once per day instead of on every /guess
+        bundle = _with_answer_keys(_load_today_player_bundle(today_et))
+        # /play shows the first `revealed` lines; slice each prefix once per day
+        lines = bundle.get("stat_lines") or []
+        bundle["stat_line_prefixes"] = tuple(tuple(lines[:i]) for i in range(1, len(lines) + 1))
+        # Hints only depend on the day's player, so resolve every line up front. If the
+        # team-record lookup failed, the bundle is retried like a JSON fallback (_cached_today_bundle).
+        hints, bundle["_hints_complete"] = _resolve_hints(bundle, len(lines))
+        bundle["_hints_for_lines"] = tuple(hints)
+        _BUNDLE_RETRY_AT = time.monotonic() + _BUNDLE_FALLBACK_TTL
+        _BUNDLE_CACHE = {today_et: bundle}
+        return bundle
+
+
+def _resolve_hints(bundle: dict, count: int) -> tuple[list[dict], bool]:
+    """Hints for the first `count` lines (one team_seasons query), and whether they are complete.
+    If the record lookup fails, the other hints are still returned with records missing."""
     try:
-        supabase.table("users").insert({"username": username}).execute()
+        return hints_resolve_batch(bundle, count), True
     except Exception:
-        # Likely a race/duplicate; fall through to reselect
-        pass
+        current_app.logger.exception("resolve_hint_values_batch failed for %s lines", count)
+    try:
+        return hints_resolve_batch(bundle, count, with_records=False), False
+    except Exception:
+        current_app.logger.exception("resolve_hint_values_batch failed without records")
+        return [{} for _ in range(count)], False
 
-    sel2 = (
-        supabase.table("users")
-        .select("id,username")
-        .ilike("username", username)
-        .maybe_single()
-        .execute()
-    )
-    row2 = getattr(sel2, "data", None)
-    return row2["id"] if row2 and (row2.get("username", "").lower() == username.lower()) else None
 
+def _safe_hints(bundle: dict, count: int) -> list[dict]:
+    """Hints for the first `count` lines; records are missing if team_seasons is unavailable."""
+    return _resolve_hints(bundle, count)[0]
 
 
-def get_today_player_bundle() -> dict:
-    """Single source of truth for /play and /guess.
-       Prefer Supabase + ET; fall back to local JSON if DB fails/not configured."""
-    today_et = str(get_today_et())
+def _load_today_player_bundle(today_et: str) -> dict:
     if supabase:
         try:
             return _db_player_bundle(today_et)
@@ -252,7 +379,7 @@ def get_today_player_bundle() -> dict:
              current_app.logger.warning("DB daily fetch failed; falling back to JSON for today: %s", e)
 
     # JSON fallback (dev only), but still use ET date for determinism
-    p = pick_player_of_day(get_today_et(), PLAYERS)
+    p = pick_player_of_day(date.fromisoformat(today_et), _players())
     return {
         "id": None,
         "full_name": p["full_name"],
@@ -272,27 +399,20 @@ def landing():
                 flash("Username is locked for this browser.")
                 return redirect(url_for("main.landing"))
 
-            # Case-insensitive availability + reservation
+            # Case-insensitive availability + reservation in one step: the unique index on
+            # users.username_lower rejects a taken name, so there is no separate check
             if supabase:
                 try:
-                    chk = (
-                        supabase.table("users")
-                        .select("id,username")
-                        .ilike("username", proposed)
-                        .maybe_single()
-                        .execute()
-                    )
-                    row = getattr(chk, "data", None)
-                    if row and (row.get("username", "").lower() == proposed.lower()):
+                    ins = supabase.table("users").insert({"username": proposed}).execute()
+                    created = getattr(ins, "data", None) or []
+                    if created:
+                        session["user_id"] = created[0]["id"]
+                except Exception as e:
+                    # postgrest APIError carries the Postgres SQLSTATE; 23505 = unique_violation
+                    if getattr(e, "code", None) == "23505":
                         flash("That username is already taken. Try another.")
                         return redirect(url_for("main.landing"))
-                    try:
-                        supabase.table("users").insert({"username": proposed}).execute()
-                    except Exception:
-                        flash("That username is already taken. Try another.")
-                        return redirect(url_for("main.landing"))
-                except Exception:
-                    current_app.logger.exception("Username availability check failed; continuing in local session mode")
+                    current_app.logger.exception("Username reservation failed; continuing in local session mode")
                     flash("Couldn’t reach the database right now. Using a local username.")
 
             session.permanent = True
@@ -301,7 +421,7 @@ def landing():
             return redirect(url_for("main.landing"))
 
     username = session.get("username")
-    if username:
+    if username and not session.permanent:
         session.permanent = True
 
     return render_template("landing.html",
@@ -310,6 +430,14 @@ def landing():
 
 
 
+def _form_int(name: str, default: int = 1) -> int:
+    """Parse an int form field once; junk input falls back to `default` instead of a 500."""
+    try:
+        return int(request.form.get(name) or default)
+    except (TypeError, ValueError):
+        return default
+
+
 def get_username() -> str | None:
     return session.get("username")
 
@@ -322,25 +450,31 @@ def play():
         return redirect(url_for("main.landing"))
 
     # Reset daily state on new ET day (do NOT clear username; we keep it locked)
-    today_et = str(get_today_et())
+    today_et = get_today_et_str()
     if session.get("last_game_date") != today_et:
         session["last_game_date"] = today_et
         session["revealed"] = 1
-        session["hints_used"] = []
+        session["hints_used"] = 0
         session.pop("suggestions", None)
         session.pop("cheated_today", None)
         session.pop("solved_today", None)  # Clear previous day's completion status
 
     username = session.get("username")
     username_locked = bool(session.get("username_locked"))
-    if username:
+    if username and not session.permanent:
         session.permanent = True
 
+    # First request of the day on this worker with an unknown play status: build the bundle
+    # on the DB pool while has_played_today asks Supabase, so the two waits overlap
+    bundle_future = None
+    if supabase and _cached_today_bundle(today_et) is None and session.get("solved_date") != today_et:
+        bundle_future = _submit_db(get_today_player_bundle, today_et)
+
     # Determine if this user has already finished today
     already_played_today = has_played_today(username or "")
 
     # Get bundle and lines
-    bundle = get_today_player_bundle()
+    bundle = bundle_future.result() if bundle_future else get_today_player_bundle()
     lines = bundle.get("stat_lines") or []
 
     # Reveal count clamp
@@ -351,33 +485,17 @@ def play():
         revealed = 1
 
     # Normalize hints_used
-    hints_used = [str(h).lower() for h in session.get("hints_used", [])]
-    used = set(hints_used)
-
-    HIDE = {"record", "conference"}  # <--- toggle anything here
-    available_hints = [h for h in HINT_COSTS.keys() if h not in hints_used and h not in HIDE]
-
+    hint_mask = _session_hint_mask("hints_used")
+    hints_used = mask_to_hints(hint_mask)
+    available_hints = list(_available_hints(hint_mask))
 
-    # If Team is bought, Conference & Division are free via Team → hide their buttons
-    if "team" in used:
-        available_hints = [h for h in available_hints if h not in ("conference", "division")]
-    # If Division is bought, Conference is redundant → hide its button
-    elif "division" in used:
-        available_hints = [h for h in available_hints if h != "conference"]
 
-
-    # Build per-line hints for revealed lines
-    hints_for_lines = []
-    for i in range(revealed):
-        try:
-            hv = hints_resolve(bundle, i)
-        except Exception:
-            current_app.logger.exception("resolve_hint_values failed at line %s", i)
-            hv = {}
-        hints_for_lines.append(hv)
+    # Per-line hints for revealed lines (resolved once per day in the bundle cache)
+    hints_for_lines = list(bundle["_hints_for_lines"][:revealed])
 
     # Suggestions from the last wrong-but-close guess
-    suggestions = session.pop("suggestions", [])
+    # (pop() marks the session modified even for a missing key, so check first)
+    suggestions = session.pop("suggestions") if "suggestions" in session else []
 
     # Compute live score
     live_score = compute_total_score(revealed, hints_used)
@@ -388,7 +506,7 @@ def play():
         username_locked=username_locked,
         already_played_today=already_played_today,
         player_position=bundle.get("position", ""),
-        stat_lines=lines[:revealed],
+        stat_lines=bundle["stat_line_prefixes"][revealed - 1] if lines else (),
         revealed=revealed,
         hints_for_lines=hints_for_lines,
         hints_used=hints_used,
@@ -402,85 +520,63 @@ def play():
     )
 
 
+@lru_cache(maxsize=1024)
 def _db_player_bundle_for_id(pid) -> dict:
-    """Build a bundle for a specific player id (used by Practice)."""
-    meta = (
-        supabase.table("v_players_eligible")
-        .select("id,full_name,player_slug,position,college")
-        .eq("id", pid)
-        .limit(1)
-        .execute()
-    )
-    mdata = getattr(meta, "data", None) or []
-    if not mdata:
+    """Build a bundle for a specific player id (used by Practice/Timed).
+
+    Cached per pid: every guess/hint in a run re-reads the same player. Failures raise and
+    so are never cached. Callers must treat the returned dict as read-only.
+    One round-trip: the player_bundle RPC (supabase/functions.sql) returns meta + seasons."""
+    resp = supabase.rpc("player_bundle", {"pid": pid}).execute()
+    player_meta = getattr(resp, "data", None)
+    if not player_meta:
         raise RuntimeError(f"Player id {pid} not found in players.")
-    player_meta = mdata[0]
-    college = (player_meta.get("college") or "").strip() or None
-
-    sresp = (
-        supabase.table("player_seasons")
-        .select("season,team,stat1_name,stat1_value,stat2_name,stat2_value,stat3_name,stat3_value")
-        .eq("player_id", pid)
-        .order("season")
-        .execute()
-    )
-    sdata = getattr(sresp, "data", None) or []
-    stat_lines = [{
-        "season": r["season"], "team": r["team"],
-        "stats": {
-            r["stat1_name"]: r["stat1_value"],
-            r["stat2_name"]: r["stat2_value"],
-            r["stat3_name"]: r["stat3_value"],
-        }
-    } for r in sdata]
 
-    return {
+    return _with_answer_keys({
         "id": pid,
         "full_name": player_meta["full_name"],
         "player_slug": player_meta["player_slug"],
         "position": player_meta["position"],
-        "college": college,
-        "stat_lines": stat_lines,
-    }
+        "college": player_meta.get("college"),  # blank -> null in SQL
+        "stat_lines": _stat_lines_from_rows(player_meta.get("seasons") or []),
+    })
 
 
 def _get_random_player_id() -> int | None:
     """Pick a random player id from DB or None if unavailable."""
     if not supabase:
         return None
-    presp = supabase.table("v_players_eligible").select("id").limit(5000).execute()
-    pids = [r["id"] for r in (getattr(presp, "data", None) or [])]
-    if not pids:
+    try:
+        resp = supabase.rpc("random_player_id").execute()
+    except Exception:
+        current_app.logger.exception("random_player_id RPC failed; using local JSON player")
         return None
-    import random
-    return random.choice(pids)
+    return getattr(resp, "data", None) or None
 
 def _bundle_for_pid_or_json(pid=None, json_slug=None):
     """Return a bundle for a DB player (by id) or JSON fallback (by slug)."""
     if pid:
         return _db_player_bundle_for_id(pid)
     # JSON fallback by slug
-    p = next((x for x in (PLAYERS or []) if x.get("player_slug") == json_slug), None)
+    p = next((x for x in (_players() or []) if x.get("player_slug") == json_slug), None)
     if not p:
         # pick a random JSON player if slug missing
-        import random
-        p = random.choice(PLAYERS or [])
-    return {
+        p = random.choice(_players() or [])
+    return _with_answer_keys({
         "id": None,
         "full_name": p.get("full_name"),
         "player_slug": p.get("player_slug"),
         "position": p.get("position"),
         "college": (p.get("college") or None),
         "stat_lines": stat_lines_for_player(p),
-    }
+    })
 
 def _timed_pick_new_player():
     """Pick a new random player and stash identifier in session."""
     pid = _get_random_player_id()
     if pid is None:
         # JSON fallback
-        import random
-        p = random.choice(PLAYERS or [])
+        p = random.choice(_players() or [])
         session["timed_pid"] = None
         session["timed_json_slug"] = p.get("player_slug")
     else:
@@ -500,22 +596,28 @@ def timed():
         session["timed_active"] = True
         session["timed_total"] = 0
         session["timed_revealed"] = 1
-        session["timed_hints_used"] = []
+        session["timed_hints_used"] = 0
         session.pop("timed_suggestions", None)
-        session["timed_started_at"] = _dt.now(_tz.utc).isoformat()
+        session["timed_started_at"] = time.time()  # epoch seconds; no ISO format/parse per request
         _timed_pick_new_player()
 
     # Compute remaining seconds (2 minutes total)
     seconds_total = 120
     seconds_left = seconds_total
+    started = session.get("timed_started_at")
+    if isinstance(started, str):
+        # Runs started before the epoch format hold an ISO timestamp: convert it once
+        try:
+            parsed = datetime.fromisoformat(started)
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            started = parsed.timestamp()
+        except ValueError:
+            started = time.time()
+        session["timed_started_at"] = started
     try:
-        started_iso = session.get("timed_started_at")
-        if started_iso:
-            started = _dt.fromisoformat(started_iso)
-            if started.tzinfo is None:
-                started = started.replace(tzinfo=_tz.utc)
-            now = _dt.now(_tz.utc)
-            elapsed = int((now - started).total_seconds())
+        if started:
+            elapsed = int(time.time() - float(started))
             seconds_left = max(0, seconds_total - elapsed)
     except Exception:
         seconds_left = seconds_total
@@ -525,7 +627,7 @@ def timed():
         total = int(session.get("timed_total", 0) or 0)
         saved = False
         if supabase and session.get("username"):
-            uid = _get_or_create_user_id_ci(session["username"])
+            uid = _session_user_id(session["username"])
             if uid:
                 saved = _timed_maybe_save_top10(total, uid)
         # Clear run state
@@ -544,9 +646,10 @@ def timed():
     revealed = int(session.get("timed_revealed", 1) or 1)
     revealed = max(1, min(revealed, len(lines) or 1))
 
-    hints_used = [str(h).lower() for h in session.get("timed_hints_used", [])]
-    HIDE = {"record", "conference"}  # <--- toggle anything here
-    available_hints = [h for h in HINT_COSTS.keys() if h not in hints_used and h not in HIDE]
+    hint_mask = _session_hint_mask("timed_hints_used")
+    hints_used = mask_to_hints(hint_mask)
+    # Timed mode keeps every unbought button (no Team → Conference/Division collapse)
+    available_hints = list(_available_hints(hint_mask, collapse_team=False))
 
 
     suggestions = session.get("timed_suggestions", [])
@@ -561,7 +664,7 @@ def timed():
         stat_lines=lines[:revealed],
         revealed=revealed,
 
-        hints_for_lines=[hints_resolve(bundle, i) for i in range(revealed)],
+        hints_for_lines=_safe_hints(bundle, revealed),
         hints_used=hints_used,
         available_hints=available_hints,
         hint_costs=HINT_COSTS,
@@ -582,18 +685,15 @@ def timed_hint():
         return redirect(url_for("main.timed", new=1))
 
     # Keep revealed in sync
-    revealed = int(request.form.get("revealed", 1) or 1)
-    session["timed_revealed"] = revealed
+    revealed = _form_int("revealed")
+    _session_set("timed_revealed", revealed)
 
     kind = (request.form.get("hint_type") or "").strip().lower()
     if not kind or kind not in HINT_COSTS:
         flash("Unknown hint.")
         return redirect(url_for("main.timed"))
 
-    used = {str(h).lower() for h in session.get("timed_hints_used", [])}
-    if kind not in used:
-        used.add(kind)
-        session["timed_hints_used"] = list(used)
+    _buy_hint("timed_hints_used", kind)
 
     return redirect(url_for("main.timed"))
 
@@ -606,7 +706,7 @@ def timed_guess():
         return redirect(url_for("main.timed", new=1))
 
     user_guess_raw = (request.form.get("guess") or "").strip()
-    revealed = int(request.form.get("revealed", 1) or 1)
+    revealed = _form_int("revealed")
     from_suggestion = (request.form.get("from_suggestion") == "1")
 
     # Build current bundle
@@ -616,32 +716,27 @@ def timed_guess():
     )
 
     # Correctness
-    candidates = {
-        bundle["full_name"].lower(),
-        bundle["player_slug"].replace("-", " ").lower(),
-    }
-    correct_via_typo = is_typo_match(user_guess_raw, bundle["full_name"])
-    is_correct = (user_guess_raw.lower() in candidates) or correct_via_typo
+    is_correct = _is_exact_answer(user_guess_raw, bundle["_candidates"]) or is_typo_match(
+        user_guess_raw, bundle["full_name"], target_key=bundle["_typo_key"]
+    )
 
     if is_correct:
         # Points LEFT after reveals + hint buys
-        hints_used = [str(h).lower() for h in session.get("timed_hints_used", [])]
+        hints_used = _session_hints("timed_hints_used")
         per_player = compute_total_score(revealed, hints_used)
 
         session["timed_total"] = int(session.get("timed_total", 0)) + int(per_player)
 
         # Next player: reset per-answer state
         session["timed_revealed"] = 1
-        session["timed_hints_used"] = []
+        session["timed_hints_used"] = 0
         session.pop("timed_suggestions", None)
         _timed_pick_new_player()
         flash(f"Correct! +{per_player} points.")
         return redirect(url_for("main.timed"))
 
     # Wrong → suggestions or reveal
-    population = _get_suggest_population()
-    same_pos = [(n, pos) for (n, pos) in population if pos == bundle.get("position")]
-    pool = same_pos if same_pos else population
+    pool = _suggest_pool(bundle.get("position"))
     suggestions = suggest_players(user_guess_raw, pool, limit=4, min_score=72)
 
     if suggestions and not from_suggestion:
@@ -653,11 +748,11 @@ def timed_guess():
         session["timed_suggestions"] = suggestions
 
     revealed = min(int(session.get("timed_revealed", 1) or 1) + 1, 5)
-    session["timed_revealed"] = revealed
+    _session_set("timed_revealed", revealed)
     flash("Nope! Another season line revealed.")
     return redirect(url_for("main.timed"))
 
-def _timed_maybe_save_top10(score: int, user_id: int) -> bool:
+def _timed_maybe_save_top10(score: int, user_id: str) -> bool:
     """
     Save a timed score only if it qualifies for the global Top 10.
     - Reads current Top 10 (desc).
@@ -688,7 +783,7 @@ def _timed_maybe_save_top10(score: int, user_id: int) -> bool:
 
         # 2) Insert (no .select() chaining)
         supabase.table("timed_results").insert(
-            {"user_id": int(user_id), "score": int(score)}
+            {"user_id": user_id, "score": int(score)}
         ).execute()
 
         # 3) Verify by re-reading Top 10
@@ -701,7 +796,7 @@ def _timed_maybe_save_top10(score: int, user_id: int) -> bool:
         )
         rows = getattr(verify, "data", None) or []
         saved = any(
-            int(r.get("user_id", -1)) == int(user_id) and int(r.get("score", -10**9)) == int(score)
+            r.get("user_id") == user_id and int(r.get("score", -10**9)) == int(score)
             for r in rows
         )
         current_app.logger.info(f"[timed/top10] saved={saved} score={score} user_id={user_id} top10_after={[r.get('score') for r in rows]}")
@@ -727,7 +822,7 @@ def timed_skip():
 
     # Next round: reset per-answer state and pick a new player
     session["timed_revealed"] = 1
-    session["timed_hints_used"] = []
+    session["timed_hints_used"] = 0
     session.pop("timed_suggestions", None)
     _timed_pick_new_player()
 
@@ -743,7 +838,7 @@ def timed_finish():
     saved = False
     if supabase and session.get("username"):
         try:
-            uid = _get_or_create_user_id_ci(session["username"])
+            uid = _session_user_id(session["username"])
             if uid:
                 saved = _timed_maybe_save_top10(total, uid)  # (score, user_id)
         except Exception:
@@ -761,6 +856,30 @@ def timed_finish():
 
 
 
+def _fetch_timed_top10() -> list[dict]:
+    # Best timed runs, then one users lookup for their names. timed_results isn't defined in
+    # supabase/schema.sql, so there is no FK PostgREST could embed users through.
+    res = (
+        supabase.table("timed_results")
+        .select("user_id,score,inserted_at")
+        .order("score", desc=True)
+        .limit(10)
+        .execute()
+    )
+    data = getattr(res, "data", None) or []
+    user_ids = sorted({r["user_id"] for r in data if r.get("user_id") is not None})
+    id_to_name = {}
+    if user_ids:
+        ures = supabase.table("users").select("id,username").in_("id", user_ids).execute()
+        id_to_name = {u["id"]: u["username"] for u in (getattr(ures, "data", None) or [])}
+    return [
+        {"username": id_to_name.get(r.get("user_id"), "unknown"),
+         "score": r["score"],
+         "when": r.get("inserted_at")}
+        for r in data
+    ]
+
+
 @bp.route("/leaderboard/timed")
 def timed_leaderboard():
     rows = []
@@ -768,129 +887,56 @@ def timed_leaderboard():
         return render_template("timed_leaderboard.html", rows=rows)
 
     try:
-        res = (
-            supabase.table("timed_results")
-            .select("user_id,score,inserted_at")
-            .order("score", desc=True)
-            .limit(10)
-            .execute()
-        )
-        data = getattr(res, "data", None) or []
-        user_ids = sorted({r["user_id"] for r in data if r.get("user_id") is not None})
-        id_to_name = {}
-        if user_ids:
-            ures = supabase.table("users").select("id,username").in_("id", user_ids).execute()
-            id_to_name = {u["id"]: u["username"] for u in (getattr(ures, "data", None) or [])}
-        rows = [
-            {"username": id_to_name.get(r["user_id"], "unknown"),
-             "score": r["score"],
-             "when": r.get("inserted_at")}
-            for r in data
-        ]
+        rows = _fetch_timed_top10()
     except Exception:
         current_app.logger.exception("Timed leaderboard query failed")
 
     return render_template("timed_leaderboard.html", rows=rows)
 
 
+def _fetch_daily_rows_with_cheated(today_et: str) -> list[dict]:
+    # Daily (today); usernames come back embedded via the user_id FK in the same call
+    res = (supabase.table("results")
+           .select("score,cheated,users!inner(username)")
+           .eq("game_date", today_et)
+           .order("score", desc=True)
+           .limit(50)
+           .execute())
+    return [{
+        "username": (r.get("users") or {}).get("username") or "unknown",
+        "score": r["score"],
+        "cheated": bool(r.get("cheated"))  # <-- include cheated flag
+    } for r in (getattr(res, "data", None) or [])]
+
+
 @bp.route("/leaderboards")
 def leaderboards():
     active = (request.args.get("tab") or "daily").lower()
-    today_et = str(get_today_et())
+    today_et = get_today_et_str()
 
     daily_rows = []
     timed_rows = []
     alltime_rows = []
 
     if supabase:
-        try:
-            # Daily (today)
-            res = (supabase.table("results")
-                   .select("score,user_id,cheated")
-                   .eq("game_date", today_et)
-                   .order("score", desc=True)
-                   .limit(50)
-                   .execute())
-            data = getattr(res, "data", None) or []
-            uids = sorted({r["user_id"] for r in data if r.get("user_id") is not None})
-            id_to_name = {}
-            if uids:
-                ures = supabase.table("users").select("id,username").in_("id", uids).execute()
-                id_to_name = {u["id"]: u["username"] for u in (getattr(ures, "data", None) or [])}
-            daily_rows = [{
-                "username": id_to_name.get(r["user_id"], "unknown"),
-                "score": r["score"],
-                "cheated": bool(r.get("cheated"))  # <-- include cheated flag
-            } for r in data]
-
-
-
+        # The three sections are independent: fire them together so the page waits
+        # for the slowest query instead of the sum of all three
+        daily_f = _submit_db(_fetch_daily_rows_with_cheated, today_et)
+        timed_f = _submit_db(_fetch_timed_top10)
+        alltime_f = _submit_db(_fetch_all_time_rows)
 
+        try:
+            daily_rows = daily_f.result()
         except Exception:
             current_app.logger.exception("leaderboards daily failed")
 
         try:
-            # Timed Top 10
-            tres = (supabase.table("timed_results")
-                    .select("user_id,score,inserted_at")
-                    .order("score", desc=True)
-                    .limit(10)
-                    .execute())
-            tdata = getattr(tres, "data", None) or []
-            tuids = sorted({r["user_id"] for r in tdata if r.get("user_id") is not None})
-            t_id_to_name = {}
-            if tuids:
-                tures = supabase.table("users").select("id,username").in_("id", tuids).execute()
-                t_id_to_name = {u["id"]: u["username"] for u in (getattr(tures, "data", None) or [])}
-            timed_rows = [{"username": t_id_to_name.get(r["user_id"], "unknown"),
-                           "score": r["score"],
-                           "when": r.get("inserted_at")} for r in tdata]
+            timed_rows = timed_f.result()
         except Exception:
             current_app.logger.exception("leaderboards timed failed")
 
         try:
-            # Daily all-time (sum)
-            res2 = supabase.table("results").select("user_id,score").execute()
-            d2 = getattr(res2, "data", None) or []
-            from collections import defaultdict
-            agg = defaultdict(int)
-            for r in d2:
-                uid = r.get("user_id")
-                s = r.get("score") or 0
-                if uid:
-                    agg[uid] += s
-
-            auids = list(agg.keys())
-
-            # id -> username
-            a_id_to_name = {}
-            if auids:
-                aures = supabase.table("users").select("id,username").in_("id", auids).execute()
-                a_id_to_name = {u["id"]: u["username"] for u in (getattr(aures, "data", None) or [])}
-
-            # id -> current_streak (mirror the logic used in /leaderboard/all-time)
-            id_to_streak = {}
-            if auids:
-                try:
-                    sres = (
-                        supabase.table("streaks")
-                        .select("user_id,current_streak")
-                        .in_("user_id", auids)
-                        .execute()
-                    )
-                    id_to_streak = {s["user_id"]: int(s.get("current_streak") or 0)
-                                    for s in (getattr(sres, "data", None) or [])}
-                except Exception:
-                    current_app.logger.exception("leaderboards all-time streaks fetch failed")
-
-            alltime_rows = sorted(
-                [{
-                    "username": a_id_to_name.get(uid, "unknown"),
-                    "total_score": total,
-                    "streak": id_to_streak.get(uid, 0),
-                } for uid, total in agg.items()],
-                key=lambda x: x["total_score"], reverse=True
-            )
+            alltime_rows = alltime_f.result()
         except Exception:
             current_app.logger.exception("leaderboards all-time failed")
 
@@ -918,8 +964,7 @@ def practice():
         pid = _get_random_player_id()
         if pid is None:
             # JSON fallback
-            import random
-            p = random.choice(PLAYERS or [])
+            p = random.choice(_players() or [])
             session["practice_pid"] = None
             session["practice_json_slug"] = p.get("player_slug")
             bundle = {
@@ -937,13 +982,13 @@ def practice():
 
         # reset per-run state
         session["practice_revealed"] = 1
-        session["practice_hints_used"] = []
+        session["practice_hints_used"] = 0
         session.pop("practice_suggestions", None)
     else:
         # Re-hydrate existing bundle
         json_slug = session.get("practice_json_slug")
         if json_slug:
-            p = next((x for x in (PLAYERS or []) if x.get("player_slug") == json_slug), None)
+            p = next((x for x in (_players() or []) if x.get("player_slug") == json_slug), None)
             if not p:
                 return redirect(url_for("main.practice", new=1))
             bundle = {
@@ -967,14 +1012,9 @@ def practice():
     revealed = max(1, min(revealed, len(lines) or 1))
 
     # Hints
-    hints_used = [str(h).lower() for h in session.get("practice_hints_used", [])]
-    used = set(hints_used)
-    HIDE = {"record", "conference"}  # <--- toggle anything here
-    available_hints = [h for h in HINT_COSTS.keys() if h not in hints_used and h not in HIDE]
-    if "team" in used:
-        available_hints = [h for h in available_hints if h not in ("conference", "division")]
-    elif "division" in used:
-        available_hints = [h for h in available_hints if h != "conference"]
+    hint_mask = _session_hint_mask("practice_hints_used")
+    hints_used = mask_to_hints(hint_mask)
+    available_hints = list(_available_hints(hint_mask))
 
     # Suggestions
     suggestions = session.get("practice_suggestions", [])
@@ -991,7 +1031,7 @@ def practice():
         player_position=bundle.get("position", ""),
         stat_lines=lines[:revealed],
         revealed=revealed,
-        hints_for_lines=[hints_resolve(bundle, i) for i in range(revealed)],
+        hints_for_lines=_safe_hints(bundle, revealed),
         hints_used=hints_used,
         available_hints=available_hints,
         hint_costs=HINT_COSTS,
@@ -1011,41 +1051,38 @@ def practice_guess():
         return redirect(url_for("main.landing"))
 
     user_guess_raw = (request.form.get("guess") or "").strip()
-    revealed = int(request.form.get("revealed", 1) or 1)
+    revealed = _form_int("revealed")
     from_suggestion = (request.form.get("from_suggestion") == "1")
 
     # Rebuild current bundle
     json_slug = session.get("practice_json_slug")
     pid = session.get("practice_pid")
     if json_slug:
-        p = next((x for x in (PLAYERS or []) if x.get("player_slug") == json_slug), None)
+        p = next((x for x in (_players() or []) if x.get("player_slug") == json_slug), None)
         if not p:
             return redirect(url_for("main.practice", new=1))
-        bundle = {
+        bundle = _with_answer_keys({
             "id": None,
             "full_name": p.get("full_name"),
             "player_slug": p.get("player_slug"),
             "position": p.get("position"),
             "college": (p.get("college") or None),
             "stat_lines": stat_lines_for_player(p),
-        }
+        })
     else:
         if not pid:
             return redirect(url_for("main.practice", new=1))
         bundle = _db_player_bundle_for_id(pid)
 
     # Check correctness (same logic as daily)
-    candidates = {
-        bundle["full_name"].lower(),
-        bundle["player_slug"].replace("-", " ").lower(),
-    }
-    correct_via_typo = is_typo_match(user_guess_raw, bundle["full_name"])
-    is_correct = (user_guess_raw.lower() in candidates) or correct_via_typo
+    is_correct = _is_exact_answer(user_guess_raw, bundle["_candidates"]) or is_typo_match(
+        user_guess_raw, bundle["full_name"], target_key=bundle["_typo_key"]
+    )
 
     # Correct -> show practice result (no DB writes)
     if is_correct:
         # compute score for fun
-        hints_used = session.get("practice_hints_used", [])
+        hints_used = _session_hints("practice_hints_used")
         score = compute_total_score(revealed, hints_used)
 
         # clear current run
@@ -1060,9 +1097,7 @@ def practice_guess():
         )
 
     # Wrong -> suggestions flow (no attempt count if showing suggestions)
-    population = _get_suggest_population()
-    same_pos = [(n, pos) for (n, pos) in population if pos == bundle.get("position")]
-    pool = same_pos if same_pos else population
+    pool = _suggest_pool(bundle.get("position"))
     suggestions = suggest_players(user_guess_raw, pool, limit=4, min_score=80)
 
     if suggestions and not from_suggestion:
@@ -1074,7 +1109,7 @@ def practice_guess():
         session["practice_suggestions"] = suggestions
 
     revealed = min(int(session.get("practice_revealed", 1) or 1) + 1, 5)
-    session["practice_revealed"] = revealed
+    _session_set("practice_revealed", revealed)
     flash("Nope! Another season line revealed.")
     return redirect(url_for("main.practice"))
 
@@ -1085,23 +1120,19 @@ def practice_hint():
         flash("Create a display name first.")
         return redirect(url_for("main.landing"))
 
-    revealed = int(request.form.get("revealed", 1) or 1)
-    session["practice_revealed"] = revealed
+    revealed = _form_int("revealed")
+    _session_set("practice_revealed", revealed)
 
     kind = (request.form.get("hint_type") or "").strip().lower()
     if not kind or kind not in HINT_COSTS:
         flash("Unknown hint.")
         return redirect(url_for("main.practice"))
 
-    used = {str(h).lower() for h in session.get("practice_hints_used", [])}
-
     # Guard: if Team already bought, ignore Conference/Division charges
-    if "team" in used and kind in {"conference", "division"}:
+    if "team" in _session_hints("practice_hints_used") and kind in {"conference", "division"}:
         return redirect(url_for("main.practice"))
 
-    if kind not in used:
-        used.add(kind)
-        session["practice_hints_used"] = list(used)
+    _buy_hint("practice_hints_used", kind)
 
     return redirect(url_for("main.practice"))
 
@@ -1117,7 +1148,7 @@ def practice_giveup():
     answer = "Unknown"
     try:
         if json_slug:
-            p = next((x for x in (PLAYERS or []) if x.get("player_slug") == json_slug), None)
+            p = next((x for x in (_players() or []) if x.get("player_slug") == json_slug), None)
             if p:
                 answer = p.get("full_name", "Unknown")
         elif pid:
@@ -1140,6 +1171,38 @@ def practice_giveup():
     return render_template("practice_result.html", success=False, answer=answer, score=0)
 
 
+# Background saves retry transient failures with exponential backoff (1, 2, 4, 8 s) for up to
+# _SAVE_RETRY_BUDGET seconds; submit_guess is first-write-wins, so a retry after a lost response
+# can't double-count. This runs on _WRITE_POOL, so the waits never hold a request-path worker.
+# A save that still fails is re-submitted from the player's session (pending_save) on their
+# next request.
+_SAVE_ATTEMPTS = 5
+_SAVE_RETRY_DELAY = 1.0
+_SAVE_RETRY_BUDGET = 60.0
+
+
+def _save_daily_result(payload: dict) -> None:
+    """Runs on _WRITE_POOL after /guess has responded; failures are logged, not raised."""
+    started = time.monotonic()
+    for attempt in range(1, _SAVE_ATTEMPTS + 1):
+        try:
+            supabase.rpc("submit_guess", payload).execute()
+            # New score: drop this worker's cached board (other workers age out within the TTL)
+            _LB_CACHE["exp"] = 0.0
+            return
+        except Exception:
+            delay = _SAVE_RETRY_DELAY * 2 ** (attempt - 1)
+            out_of_time = time.monotonic() - started + delay > _SAVE_RETRY_BUDGET
+            if attempt == _SAVE_ATTEMPTS or out_of_time:
+                current_app.logger.exception(
+                    "Supabase save failed after /guess (%s attempts); left pending in the session: %s",
+                    attempt, payload,
+                )
+                return
+            current_app.logger.warning("Supabase save attempt %s failed after /guess; retrying", attempt)
+            time.sleep(delay)
+
+
 @bp.post("/guess")
 def guess():
     username = session.get("username")
@@ -1147,14 +1210,17 @@ def guess():
         flash("Enter a username first.")
         return redirect(url_for("main.landing"))
 
+    # Blank (e.g. whitespace-only) guess: nothing to check, so skip all DB work
+    user_guess_raw = (request.form.get("guess") or "").strip()
+    if not user_guess_raw:
+        return redirect(url_for("main.play"))
+
     # If today's game already completed for this username: block further guesses
     if has_played_today(username):
         flash("You've already completed today's game. Come back tomorrow!")
         return redirect(url_for("main.play"))
 
-    user_guess_raw = (request.form.get("guess") or "").strip()
-    user_guess = user_guess_raw.lower()
-    revealed = int(request.form.get("revealed", 1) or 1)
+    revealed = _form_int("revealed")
     from_suggestion = (request.form.get("from_suggestion") == "1")
 
     bundle = get_today_player_bundle()
@@ -1164,51 +1230,38 @@ def guess():
     max_reveal = min(5, len(lines) if lines else 1)
     revealed = max(1, min(revealed, max_reveal))
 
-    # Exact/slug candidates
-    candidates = {
-        (bundle.get("full_name") or "").lower(),
-        (bundle.get("player_slug") or "").replace("-", " ").lower(),
-    }
-
-    # Typo forgiveness
-    correct_via_typo = is_typo_match(user_guess_raw, bundle.get("full_name") or "")
-    is_correct = (user_guess in candidates) or correct_via_typo
+    # Exact/slug candidates first; typo forgiveness only on a miss
+    is_correct = _is_exact_answer(user_guess_raw, bundle["_candidates"]) or is_typo_match(
+        user_guess_raw, bundle.get("full_name") or "", target_key=bundle["_typo_key"]
+    )
 
     # ----- Correct -> count & finish ------------------------------------------
     if is_correct:
-        hints_used = session.get("hints_used", [])
+        hints_used = _session_hints("hints_used")
         score = compute_total_score(revealed, hints_used)
-        today_str = str(get_today_et())
+        today_str = get_today_et_str()
 
-        # Persist to DB (results + streak update + cheat detection)
+        # Persist in the background so the result page doesn't wait on Supabase: one
+        # submit_guess RPC does user get-or-create + result + streak (supabase/functions.sql).
+        # It keeps the first score if the day was already recorded elsewhere.
         if supabase and bundle.get("id"):
-            try:
-                user_id = _get_or_create_user_id_ci(username)
-                if user_id is not None:
-                    supabase.table("results").upsert(
-                        {
-                            "game_date": today_str,
-                            "user_id": int(user_id),
-                            "revealed": int(revealed),
-                            "score": int(score),
-                            "correct_attempts": int(revealed),
-                            "cheated": bool(session.get("cheated_today", False)),
-                        },
-                        on_conflict="game_date,user_id",
-                    ).execute()
-                    # Update streaks (safe-guarded)
-                    try:
-                        _update_streaks_after_win(user_id)
-                    except Exception:
-                        current_app.logger.exception("streaks update failed")
-            except Exception:
-                current_app.logger.exception("Supabase save failed during /guess; continuing without DB.")
+            payload = {
+                "p_username": username,
+                "p_game_date": today_str,
+                "p_revealed": int(revealed),
+                "p_score": int(score),
+                "p_cheated": bool(session.get("cheated_today", False)),
+            }
+            _submit_write(_save_daily_result, payload)
+            # Queued is not saved: has_played_today re-submits this until the DB has the row
+            session["pending_save"] = payload
 
         # Mark as solved in session (helps local mode)
         session["solved_today"] = True
+        session["solved_date"] = today_str
         # Reset per-game UI bits
         session["revealed"] = 1
-        session["hints_used"] = []
+        session["hints_used"] = 0
         session.pop("suggestions", None)
 
         return render_template(
@@ -1221,9 +1274,7 @@ def guess():
 
     # ----- Wrong ---------------------------------------------------------------
     # Build suggestions (prefer same position)
-    population = _get_suggest_population()
-    same_pos = [(n, pos) for (n, pos) in population if pos == bundle.get("position")]
-    pool = same_pos if same_pos else population
+    pool = _suggest_pool(bundle.get("position"))
     suggestions = suggest_players(user_guess_raw, pool, limit=4, min_score=80)
 
     # If suggestions exist and this is NOT from a suggestion button:
@@ -1237,7 +1288,7 @@ def guess():
     if suggestions:
         session["suggestions"] = suggestions  # still show them
     revealed = min(revealed + 1, max_reveal)
-    session["revealed"] = revealed
+    _session_set("revealed", revealed)
     flash("Nope! Another season line revealed.")
     return redirect(url_for("main.play"))
 
@@ -1246,8 +1297,8 @@ def guess():
 @bp.post("/hint")
 def hint():
     # Keep revealed in sync when you click a hint button
-    revealed = int(request.form.get("revealed", 1) or 1)
-    session["revealed"] = revealed
+    revealed = _form_int("revealed")
+    _session_set("revealed", revealed)
 
     # Normalize the posted hint type to lowercase
     kind = (request.form.get("hint_type") or "").strip().lower()
@@ -1256,11 +1307,7 @@ def hint():
         return redirect(url_for("main.play"))
 
     # Record single purchase per hint kind (global per game)
-    current = session.get("hints_used", [])
-    hints_used = {str(h).lower() for h in current}
-    if kind not in hints_used:
-        hints_used.add(kind)
-        session["hints_used"] = list(hints_used)
+    _buy_hint("hints_used", kind)
 
     return redirect(url_for("main.play"))
 
@@ -1269,61 +1316,47 @@ def hint():
 
 
 
+# Short-lived cache of today's leaderboard rows; every visitor sees the same top 50
+_LB_TTL_SECONDS = 15  # safety net; saves also expire it (see _save_daily_result)
+_LB_CACHE: dict = {"key": None, "rows": [], "exp": 0.0}
+
+
+def _fetch_leaderboard_rows(today_et: str) -> list[dict]:
+    # Today's results, highest score first; username/streak joined in the view
+    res = (
+        supabase.table("v_daily_leaderboard")
+        .select("username,score,current_streak")
+        .eq("game_date", today_et)
+        .order("score", desc=True)
+        .limit(50)
+        .execute()
+    )
+    return [
+        {
+            "username": r.get("username") or "unknown",
+            "score": r["score"],
+            "streak": int(r.get("current_streak") or 0),
+        }
+        for r in (getattr(res, "data", None) or [])
+    ]
+
+
 @bp.route("/leaderboard")
 def leaderboard():
     rows = []
-    today_et = str(get_today_et())
+    today_et = get_today_et_str()
     today_label = today_et
 
     if not supabase:
         return render_template("leaderboard.html", rows=rows, today_label=today_label)
 
-    try:
-        # Today's results, highest score first
-        res = (
-            supabase.table("results")
-            .select("score, user_id")
-            .eq("game_date", today_et)
-            .order("score", desc=True)
-            .limit(50)
-            .execute()
-        )
-        data = getattr(res, "data", None) or []
-        if not data:
-            return render_template("leaderboard.html", rows=rows, today_label=today_label)
-
-        user_ids = sorted({r["user_id"] for r in data if r.get("user_id") is not None})
-
-        # id -> username
-        id_to_name = {}
-        if user_ids:
-            ures = supabase.table("users").select("id, username").in_("id", user_ids).execute()
-            id_to_name = {u["id"]: u["username"] for u in (getattr(ures, "data", None) or [])}
+    now = time.monotonic()
+    if _LB_CACHE["key"] == today_et and now < _LB_CACHE["exp"]:
+        return render_template("leaderboard.html", rows=_LB_CACHE["rows"], today_label=today_label)
 
-        # id -> current_streak
-        id_to_streak = {}
-        if user_ids:
-            try:
-                sres = (
-                    supabase.table("streaks")
-                    .select("user_id,current_streak")
-                    .in_("user_id", user_ids)
-                    .execute()
-                )
-                id_to_streak = {s["user_id"]: int(s.get("current_streak") or 0)
-                                for s in (getattr(sres, "data", None) or [])}
-            except Exception:
-                current_app.logger.exception("Leaderboard streaks fetch failed")
-                id_to_streak = {}
-
-        rows = [
-            {
-                "username": id_to_name.get(r["user_id"], "unknown"),
-                "score": r["score"],
-                "streak": id_to_streak.get(r["user_id"], 0),
-            }
-            for r in data
-        ]
+    try:
+        rows = _fetch_leaderboard_rows(today_et)
+        _LB_CACHE.update(key=today_et, rows=rows, exp=now + _LB_TTL_SECONDS)
     except Exception:
         current_app.logger.exception("Leaderboard query failed")
 
@@ -1332,6 +1365,25 @@ def leaderboard():
 
 
 
+def _fetch_all_time_rows() -> list[dict]:
+    # Sum/join/sort happen in Postgres (v_all_time_leaderboard); we only get the top rows
+    res = (
+        supabase.table("v_all_time_leaderboard")
+        .select("username,total_score,current_streak")
+        .order("total_score", desc=True)
+        .limit(50)
+        .execute()
+    )
+    return [
+        {
+            "username": r.get("username") or "unknown",
+            "total_score": r.get("total_score") or 0,
+            "streak": int(r.get("current_streak") or 0),
+        }
+        for r in (getattr(res, "data", None) or [])
+    ]
+
+
 @bp.route("/leaderboard/all-time")
 def all_time():
     rows = []
@@ -1339,55 +1391,7 @@ def all_time():
         return render_template("all_time.html", rows=rows)
 
     try:
-        # Sum scores per user
-        res = supabase.table("results").select("user_id,score").execute()
-        data = getattr(res, "data", None) or []
-        if not data:
-            return render_template("all_time.html", rows=rows)
-
-        from collections import defaultdict
-        agg = defaultdict(int)
-        for r in data:
-            uid = r.get("user_id")
-            s = r.get("score") or 0
-            if uid:
-                agg[uid] += s
-
-        user_ids = list(agg.keys())
-
-        # id -> username
-        id_to_name = {}
-        if user_ids:
-            ures = supabase.table("users").select("id, username").in_("id", user_ids).execute()
-            id_to_name = {u["id"]: u["username"] for u in (getattr(ures, "data", None) or [])}
-
-        # id -> current_streak
-        id_to_streak = {}
-        if user_ids:
-            try:
-                sres = (
-                    supabase.table("streaks")
-                    .select("user_id,current_streak")
-                    .in_("user_id", user_ids)
-                    .execute()
-                )
-                id_to_streak = {s["user_id"]: int(s.get("current_streak") or 0)
-                                for s in (getattr(sres, "data", None) or [])}
-            except Exception:
-                current_app.logger.exception("All-time streaks fetch failed")
-
-        rows = sorted(
-            [
-                {
-                    "username": id_to_name.get(uid, "unknown"),
-                    "total_score": total,
-                    "streak": id_to_streak.get(uid, 0),
-                }
-                for uid, total in agg.items()
-            ],
-            key=lambda x: x["total_score"],
-            reverse=True,
-        )
+        rows = _fetch_all_time_rows()
     except Exception:
         current_app.logger.exception("All-time leaderboard query failed")
 
@@ -1399,11 +1403,16 @@ def all_time():
 def health():
     return {"ok": True}
 
+# Last /debug save probe per worker: (monotonic time, result fields)
+_PROBE_TTL_SECONDS = 60
+_LAST_PROBE: tuple[float, dict | None] = (0.0, None)
+
+
 @bp.route("/debug")
 def debug():
     info = {
         "supabase_configured": bool(supabase),
-        "today_et": str(get_today_et()),
+        "today_et": get_today_et_str(),
         "save_probe_ok": None,
         "save_probe_error": None,
     }
@@ -1413,18 +1422,25 @@ def debug():
         info["save_probe_error"] = "supabase not configured"
         return info
 
+    # The save probe writes to real tables: only run it on ?probe=1, and at most once a
+    # minute per worker. Otherwise report the last probe (if recent).
+    global _LAST_PROBE
+    now = time.monotonic()
+    probed_at, last = _LAST_PROBE
+    fresh = last is not None and now - probed_at < _PROBE_TTL_SECONDS
+    if request.args.get("probe") != "1" or fresh:
+        if fresh:
+            info.update(last)
+            info["save_probe_age_s"] = int(now - probed_at)
+        else:
+            info["save_probe_error"] = "probe skipped; pass ?probe=1 to run it"
+        return info
+
     # Try to upsert a test user + a result for today ET
     try:
-       
-        supabase.table("users").upsert({"username": "local-probe-user"}, on_conflict="username").execute()
-        u = (
-            supabase.table("users")
-            .select("id")
-            .eq("username", "local-probe-user")
-            .single()
-            .execute()
-        )
-        uid = u.data["id"]
+        # Upsert returns the row (PostgREST return=representation); no read-back select
+        u = supabase.table("users").upsert({"username": "local-probe-user"}, on_conflict="username").execute()
+        uid = u.data[0]["id"]
 
 
         gdate = info["today_et"]
@@ -1437,6 +1453,7 @@ def debug():
         info["save_probe_ok"] = False
         info["save_probe_error"] = str(e)
 
+    _LAST_PROBE = (now, {"save_probe_ok": info["save_probe_ok"], "save_probe_error": info["save_probe_error"]})
     return info
 
 @bp.get("/debug-hints")
@@ -1444,10 +1461,8 @@ def debug_hints():
     bundle = get_today_player_bundle()
     lines = bundle.get("stat_lines") or []
     out = []
-    from .services.hints import canon, resolve_hint_values
-    for i, line in enumerate(lines):
+    for i, (line, hv) in enumerate(zip(lines, hints_resolve_batch(bundle, len(lines)))):
         raw_team = line.get("team")
-        hv = resolve_hint_values(bundle, i)
         out.append({
             "i": i,
             "season": line.get("season"),
@@ -1470,22 +1485,7 @@ def debug_timed_save():
             return {"ok": False, "err": "failed to ensure user"}
 
         saved = _timed_maybe_save_top10(7, uid)
-
-        res = (
-            supabase.table("timed_results")
-            .select("user_id,score,inserted_at")
-            .order("score", desc=True)
-            .limit(10)
-            .execute()
-        )
-        rows = getattr(res, "data", None) or []
-        uids = sorted({r["user_id"] for r in rows if r.get("user_id") is not None})
-        id_to_name = {}
-        if uids:
-            ures = supabase.table("users").select("id,username").in_("id", uids).execute()
-            id_to_name = {u["id"]: u["username"] for u in (getattr(ures, "data", None) or [])}
-        top10 = [{"username": id_to_name.get(r["user_id"], "unknown"),
-                  "score": r["score"], "when": r.get("inserted_at")} for r in rows]
+        top10 = _fetch_timed_top10()
         return {"ok": True, "saved": saved, "top10": top10}
     except Exception as e:
         current_app.logger.exception("debug-timed-save failed")
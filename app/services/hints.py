@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from .. import supabase
 
 # Legacy/alt → canonical modern codes
@@ -61,10 +61,11 @@ def _get_team_record(season: int, team: str) -> Optional[str]:
             .select("wins,losses,ties")
             .eq("season", int(season))
             .eq("team", team)
-            .maybe_single()
+            .limit(1)
             .execute()
         )
-        data = getattr(resp, "data", None)
+        rows = getattr(resp, "data", None) or []
+        data = rows[0] if rows else None
         if not data:
             return None
         return _format_record(
@@ -75,31 +76,39 @@ def _get_team_record(season: int, team: str) -> Optional[str]:
     except Exception:
         return None
 
-def resolve_hint_values(bundle: dict, line_idx: int) -> dict:
-    """
-    Compute hint values for the currently revealed season line.
-    Returns keys: season, team (canonical), conference, division, record (may be None).
-    Also includes player-level 'college' when available (supports bundle['college']
-    or bundle['player']['college']).
+def _get_team_records(keys: Iterable[Tuple[int, str]]) -> Dict[Tuple[int, str], str]:
+    """Batch form of _get_team_record: one team_seasons query for several (season, team) pairs.
+
+    Unlike _get_team_record, a failed query raises: callers that cache the result need to
+    tell "no record" apart from "lookup failed".
     """
-    lines = bundle.get("stat_lines") or []
-    if not lines:
+    wanted = {(int(season), team) for season, team in keys if season and team}
+    if not supabase or not wanted:
         return {}
-
-    idx = max(0, min(line_idx, len(lines) - 1))
-    line = lines[idx]
-
-    season = line.get("season")
-    raw_team = line.get("team")
-    team = canon(raw_team)
-
+    resp = (
+        supabase.table("team_seasons")
+        .select("season,team,wins,losses,ties")
+        .in_("season", sorted({s for s, _ in wanted}))
+        .in_("team", sorted({t for _, t in wanted}))
+        .execute()
+    )
+    out: Dict[Tuple[int, str], str] = {}
+    # The two in_() filters return a cross product; keep only the pairs we asked for
+    for r in getattr(resp, "data", None) or []:
+        key = (int(r.get("season") or 0), r.get("team"))
+        if key in wanted and key not in out:
+            out[key] = _format_record(
+                int(r.get("wins", 0) or 0),
+                int(r.get("losses", 0) or 0),
+                int(r.get("ties", 0) or 0),
+            )
+    return out
+
+def _line_hints(season, team: Optional[str], record: Optional[str]) -> dict:
     conf = div = None
     if team and team in DIVISION_BY_TEAM:
         conf, div = DIVISION_BY_TEAM[team]
-
-    record = _get_team_record(int(season), team) if (season and team) else None
-
-    result = {
+    return {
         "season": season,
         "team": team,
         "conference": conf,
@@ -107,6 +116,9 @@ def resolve_hint_values(bundle: dict, line_idx: int) -> dict:
         "record": record,
     }
 
+def _player_hints(bundle: dict) -> dict:
+    result: dict = {}
+
     # Player-level: accept both bundle['college'] and bundle['player']['college']
     college = (
         (bundle.get("college") or "")
@@ -143,7 +155,49 @@ def resolve_hint_values(bundle: dict, line_idx: int) -> dict:
         if last:
             result["last_name"] = last
 
-
     return result
 
+def resolve_hint_values(bundle: dict, line_idx: int) -> dict:
+    """
+    Compute hint values for the currently revealed season line.
+    Returns keys: season, team (canonical), conference, division, record (may be None).
+    Also includes player-level 'college' when available (supports bundle['college']
+    or bundle['player']['college']).
+    """
+    lines = bundle.get("stat_lines") or []
+    if not lines:
+        return {}
+
+    idx = max(0, min(line_idx, len(lines) - 1))
+    line = lines[idx]
+
+    season = line.get("season")
+    team = canon(line.get("team"))
+    record = _get_team_record(int(season), team) if (season and team) else None
 
+    result = _line_hints(season, team, record)
+    result.update(_player_hints(bundle))
+    return result
+
+def resolve_hint_values_batch(bundle: dict, count: int, with_records: bool = True) -> List[dict]:
+    """
+    resolve_hint_values for lines 0..count-1 in one pass: team records come from a
+    single team_seasons query and the player-level hints are computed once.
+    Raises if that query fails; with_records=False skips it (every record is None).
+    """
+    lines = bundle.get("stat_lines") or []
+    if not lines or count <= 0:
+        return []
+
+    picked = [lines[max(0, min(i, len(lines) - 1))] for i in range(count)]
+    keys = [(line.get("season"), canon(line.get("team"))) for line in picked]
+    records = _get_team_records(keys) if with_records else {}
+    player = _player_hints(bundle)
+
+    out: List[dict] = []
+    for season, team in keys:
+        record = records.get((int(season), team)) if (season and team) else None
+        hv = _line_hints(season, team, record)
+        hv.update(player)
+        out.append(hv)
+    return out
@@ -1,15 +1,10 @@
 # app/services/match.py
 from __future__ import annotations
-from typing import Iterable, List, Optional, Tuple
+from typing import Iterable, List, Mapping, Optional, Tuple, Union
 import re
 
-try:
-    # Better quality/speed
-    from rapidfuzz import fuzz, process  # type: ignore
-    HAVE_RAPIDFUZZ = True
-except Exception:
-    HAVE_RAPIDFUZZ = False
-    from difflib import get_close_matches  # fallback
+# rapidfuzz is a hard requirement (requirements.txt); its scorers are C++ and much faster than difflib
+from rapidfuzz import fuzz, process, utils
 
 
 # --- Normalization helpers ----------------------------------------------------
@@ -46,24 +41,30 @@ def short_key(s: str) -> str:
 
 # --- Typo forgiveness for the *correct* player --------------------------------
 
-# app/services/match.py
-from rapidfuzz import fuzz, utils
-
 def _norm(s: str) -> str:
     return utils.default_process(s or "")
 
-def is_typo_match(guess: str, target: str, cutoff: int = 78) -> bool:
-    """More forgiving match: try several scorers and accept the best."""
+def typo_key(target: str) -> str:
+    """Processed form of a target name; pass it as `target_key` to skip re-processing."""
+    return _norm(target)
+
+def is_typo_match(guess: str, target: str, cutoff: int = 78, target_key: Optional[str] = None) -> bool:
+    """More forgiving match: try several scorers and accept the best.
+
+    Scorers run cheapest first and stop at the first one that clears `cutoff`;
+    `score_cutoff` lets rapidfuzz bail out early inside each comparison too.
+    Plain `ratio` never beats WRatio, so leading with it doesn't change results.
+    """
     g = _norm(guess)
-    t = _norm(target)
+    t = target_key if target_key is not None else _norm(target)
     if not g or not t:
         return False
-    scores = (
-        fuzz.WRatio(g, t),
-        fuzz.token_set_ratio(g, t),
-        fuzz.partial_ratio(g, t),
+    if g == t:
+        return True
+    return any(
+        scorer(g, t, score_cutoff=cutoff)
+        for scorer in (fuzz.ratio, fuzz.token_set_ratio, fuzz.partial_ratio, fuzz.WRatio)
     )
-    return max(scores) >= cutoff
 
 
 
@@ -71,43 +72,36 @@ def is_typo_match(guess: str, target: str, cutoff: int = 78) -> bool:
 
 def suggest_players(
     query: str,
-    population: Iterable[Tuple[str, str]],
+    population: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
     limit: int = 5,
     min_score: int = 80,
 ) -> List[str]:
     """
     Suggest up to `limit` player full-names similar to `query`.
 
-    population: iterable of (full_name, position) or (full_name, anything).
-    We only use full_name for scoring; keep position there if you want to pre-filter.
+    population: either a mapping {full_name: norm_name(full_name)} (preferred; build it
+    once and reuse it), or an iterable of (full_name, anything) pairs, normalized per call.
+    Scoring compares normalized names; the original full names are returned.
     """
     qn = norm_name(query)
     if not qn:
         return []
 
-    names: List[str] = [full for (full, _) in population]
+    if isinstance(population, Mapping):
+        choices = population
+    else:
+        choices = {full: norm_name(full) for (full, _) in population}
 
-    if not names:
+    if not choices:
         return []
 
-    if HAVE_RAPIDFUZZ:
-        # Use token_set_ratio so order & duplicates don’t hurt.
-        scored = process.extract(
-            qn,
-            names,
-            scorer=fuzz.token_set_ratio,
-            limit=limit * 2,  # extra then filter by min_score
-        )
-        out: List[str] = []
-        for candidate, score, _idx in scored:
-            if score >= min_score:
-                out.append(candidate)
-            if len(out) >= limit:
-                break
-        return out
-    else:
-        # difflib fallback
-        close = get_close_matches(qn, [norm_name(n) for n in names], n=limit, cutoff=0.85)
-        # map back to original capitalized names (simple best-effort)
-        mapping = {norm_name(n): n for n in names}
-        return [mapping.get(c, c) for c in close]
+    # Use token_set_ratio so order & duplicates don’t hurt. With a mapping, rapidfuzz scores
+    # the values and hands back the key (full name); score_cutoff drops weak matches inside C++.
+    scored = process.extract(
+        qn,
+        choices,
+        scorer=fuzz.token_set_ratio,
+        limit=limit,
+        score_cutoff=min_score,
+    )
+    return [full for _normed, _score, full in scored]
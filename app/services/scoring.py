@@ -18,6 +18,35 @@ HINT_COSTS = {
     "last_name": 60,
 }
 
+# One bit per hint kind, for storing purchases in the session as a single int.
+# Masks live in users' cookies: never renumber a bit; give a new kind the next free one.
+HINT_BITS = {
+    "team": 1 << 0,
+    "division": 1 << 1,
+    "conference": 1 << 2,
+    "record": 1 << 3,
+    "college": 1 << 4,
+    "first_name": 1 << 5,
+    "last_name": 1 << 6,
+}
+assert HINT_BITS.keys() == HINT_COSTS.keys(), "every hint kind needs exactly one pinned bit"
+
+def hints_to_mask(hints_used: Iterable[str] | int | None) -> int:
+    """
+    Pack hint kinds into a HINT_BITS mask. Ints pass through, so this also
+    upgrades older sessions that stored a list of names.
+    """
+    if isinstance(hints_used, int):
+        return hints_used
+    mask = 0
+    for h in hints_used or ():
+        mask |= HINT_BITS.get(str(h).strip().lower(), 0)
+    return mask
+
+def mask_to_hints(mask: int) -> list[str]:
+    """Unpack a HINT_BITS mask into hint kinds (UI order)."""
+    return [kind for kind, bit in HINT_BITS.items() if mask & bit]
+
 def compute_score(revealed: int) -> int:
     """
     Legacy/simple scoring:
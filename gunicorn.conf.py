@@ -0,0 +1,9 @@
+# gunicorn.conf.py — gunicorn reads this automatically when started from the repo root
+# (e.g. `gunicorn run:app`). Worker count still comes from WEB_CONCURRENCY.
+import os
+
+# Requests mostly wait on Supabase over HTTPS, so give each worker a thread pool:
+# while one request waits on the network the same process keeps serving others.
+# Module-level caches are lock-protected (daily bundle) or safe to rebuild twice.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
@@ -0,0 +1,166 @@
+-- One random eligible player id, sampled server-side instead of shipping every id to Python.
+-- Random offset instead of ORDER BY random(): no sort of the whole view per pick.
+-- (TABLESAMPLE would be cheaper still, but it only works on tables, not views.)
+create or replace function public.random_player_id()
+returns uuid
+language sql
+volatile
+as $$
+  select id
+  from public.v_players_eligible
+  offset floor(random() * (select count(*) from public.v_players_eligible))
+  limit 1;
+$$;
+
+-- The eligible player for a date: hash of the date into the id-ordered roster. Same date,
+-- same player (while the roster is unchanged), like the JSON mode's date-seeded pick.
+create or replace function public.pick_player_for_date(d date)
+returns uuid
+language sql
+stable
+as $$
+  select id
+  from public.v_players_eligible
+  order by id
+  offset (
+    select abs(hashtext(d::text)::bigint) % nullif(count(*), 0)
+    from public.v_players_eligible
+  )
+  limit 1;
+$$;
+
+-- One eligible player + seasons as a JSON object (null if the id isn't eligible).
+create or replace function public.player_bundle(pid uuid)
+returns json
+language sql
+stable
+as $$
+  select json_build_object(
+    'id', p.id,
+    'full_name', p.full_name,
+    'player_slug', p.player_slug,
+    'position', p.position,
+    'college', nullif(trim(p.college), ''),
+    'seasons', coalesce((
+      select json_agg(json_build_object(
+        'season', s.season, 'team', s.team,
+        'stat1_name', s.stat1_name, 'stat1_value', s.stat1_value,
+        'stat2_name', s.stat2_name, 'stat2_value', s.stat2_value,
+        'stat3_name', s.stat3_name, 'stat3_value', s.stat3_value
+      ) order by s.season)
+      from public.player_seasons s
+      where s.player_id = p.id
+    ), '[]'::json)
+  )
+  from public.v_players_eligible p
+  where p.id = pid;
+$$;
+
+-- Returns today's player + seasons as one JSON object, creating the daily_game row if missing.
+create or replace function public.get_or_create_daily_bundle(d date)
+returns json
+language plpgsql
+as $$
+declare
+  pid uuid;
+begin
+  select player_id into pid from public.daily_game where game_date = d;
+
+  if pid is null then
+    pid := public.pick_player_for_date(d);
+    if pid is null then
+      return null;
+    end if;
+    insert into public.daily_game (game_date, player_id) values (d, pid)
+    on conflict (game_date) do nothing;
+    -- The stored row stays authoritative (the roster may change after the pick)
+    select player_id into pid from public.daily_game where game_date = d;
+  end if;
+
+  return public.player_bundle(pid);
+end;
+$$;
+
+-- Case-insensitive get-or-create of a user by name; returns the id. Safe under concurrent
+-- first logins: the unique username_lower index decides the winner and the loser re-reads.
+create or replace function public.get_or_create_user(p_username text)
+returns uuid
+language plpgsql
+as $$
+declare
+  uid uuid;
+begin
+  select id into uid from public.users where username_lower = lower(p_username);
+  if uid is null then
+    insert into public.users (username) values (p_username)
+    on conflict do nothing
+    returning id into uid;
+    if uid is null then
+      select id into uid from public.users where username_lower = lower(p_username);
+    end if;
+  end if;
+  return uid;
+end;
+$$;
+
+-- Saves a correct daily guess in one transaction: case-insensitive get-or-create of the user,
+-- the day's result (first solve wins), and the streak bump. `already_played` is true when a
+-- result for that day existed, in which case nothing is written.
+drop function if exists public.record_guess(text, date, int, int, boolean);
+
+create or replace function public.submit_guess(
+  p_username text,
+  p_game_date date,
+  p_revealed int,
+  p_score int,
+  p_cheated boolean default false
+)
+returns json
+language plpgsql
+as $$
+declare
+  uid uuid;
+  rid uuid;
+  had_yesterday boolean;
+begin
+  uid := public.get_or_create_user(p_username);
+
+  -- The unique (game_date, user_id) key makes the played-check and the write one atomic step
+  insert into public.results (game_date, user_id, revealed, score, correct_attempts, cheated)
+  values (p_game_date, uid, p_revealed, p_score, p_revealed, p_cheated)
+  on conflict (game_date, user_id) do nothing
+  returning id into rid;
+
+  if rid is null then
+    return json_build_object('user_id', uid, 'already_played', true);
+  end if;
+
+  select exists (
+    select 1 from public.results where user_id = uid and game_date = p_game_date - 1
+  ) into had_yesterday;
+
+  insert into public.streaks as s (user_id, current_streak, best_streak, updated_at)
+  values (uid, 1, 1, now())
+  on conflict (user_id) do update
+    set current_streak = case when had_yesterday then s.current_streak + 1 else 1 end,
+        best_streak = greatest(s.best_streak, case when had_yesterday then s.current_streak + 1 else 1 end),
+        updated_at = now();
+
+  return json_build_object('user_id', uid, 'already_played', false);
+end;
+$$;
+
+-- Whether `p_username` (case-insensitive) already has a result for `p_date`.
+create or replace function public.has_played_today(p_username text, p_date date)
+returns boolean
+language sql
+stable
+as $$
+  select exists (
+    select 1
+    from public.results r
+    join public.users u on u.id = r.user_id
+    where u.username_lower = lower(p_username)
+      and r.game_date = p_date
+  );
+$$;
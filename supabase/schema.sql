@@ -66,3 +66,66 @@ create table if not exists public.streaks (
 
 create index if not exists idx_results_date_score on public.results(game_date, score desc);
 create index if not exists idx_guesses_user_date on public.guesses(user_id, game_date);
+
+-- daily_game(game_date) and player_seasons(player_id, season) are already covered by their
+-- primary/unique keys. timed_results and team_seasons are created outside this file, so
+-- index them only when present: Top 10 by score, and record lookups by (season, team).
+do $$
+begin
+  if to_regclass('public.timed_results') is not null then
+    create index if not exists idx_timed_results_score on public.timed_results(score desc);
+  end if;
+  if to_regclass('public.team_seasons') is not null then
+    create index if not exists idx_team_seasons_season_team on public.team_seasons(season, team);
+  end if;
+end
+$$;
+
+-- Case-insensitive username lookups: equality on an indexed lower-case copy instead of ILIKE
+alter table public.users
+  add column if not exists username_lower text generated always as (lower(username)) stored;
+-- The old `username unique` allowed names differing only in case; those rows would make the
+-- unique index fail halfway. Stop with the list instead, so they can be merged by hand first
+-- (repoint results/guesses/streaks to one users.id per lower(username), then delete the rest).
+do $$
+declare
+  dupes text;
+begin
+  select string_agg(username_lower, ', ') into dupes
+  from (
+    select username_lower from public.users
+    group by username_lower having count(*) > 1
+  ) d;
+  if dupes is not null then
+    raise exception 'users has usernames differing only in case; merge them before creating users_username_lower: %', dupes;
+  end if;
+end
+$$;
+create unique index if not exists users_username_lower on public.users(username_lower);
+
+-- Daily leaderboard rows with username + streak joined server-side (filter by game_date).
+-- security_invoker: reads stay subject to the caller's RLS policies on the base tables.
+create or replace view public.v_daily_leaderboard
+with (security_invoker = true) as
+select r.game_date,
+       r.user_id,
+       u.username,
+       r.score,
+       r.cheated,
+       coalesce(s.current_streak, 0) as current_streak
+from public.results r
+join public.users u on u.id = r.user_id
+left join public.streaks s on s.user_id = r.user_id;
+
+-- All-time totals per user, aggregated server-side (order by total_score desc).
+-- security_invoker, as above: the caller's RLS policies apply.
+create or replace view public.v_all_time_leaderboard
+with (security_invoker = true) as
+select u.id as user_id,
+       u.username,
+       sum(r.score)::int as total_score,
+       coalesce(max(s.current_streak), 0) as current_streak
+from public.results r
+join public.users u on u.id = r.user_id
+left join public.streaks s on s.user_id = r.user_id
+group by u.id, u.username;